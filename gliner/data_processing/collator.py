@@ -1,10 +1,14 @@
+import numpy as np
 import torch
-from torch.nn.utils.rnn import pad_sequence
-import torch.nn.functional as F
 from .processor import SpanProcessor, TokenProcessor
 
 class DataCollator:
     def __init__(self, config, tokenizer, words_splitter):
+        """
+        Collates raw examples into model inputs without labels: the tokenizer outputs plus
+        `text_lengths`, and `span_idx`/`span_mask` for span-level models only (token-level
+        models get no span keys).
+        """
         self.config=config
         if config.span_mode == "token_level":
             self.data_processor = TokenProcessor(config, tokenizer, words_splitter)
@@ -14,38 +18,57 @@ class DataCollator:
     def __call__(self, input_x):
         raw_batch = self.data_processor.collate_raw_batch(input_x)
         
-        model_input = self.data_processor.collate_fn(raw_batch, prepare_labels=False)
-        model_input.update({"span_idx": raw_batch['span_idx'] if 'span_idx' in raw_batch else None, 
-                            "span_mask": raw_batch["span_mask"] if 'span_mask' in raw_batch else None,
-                            "text_lengths": raw_batch['seq_length']})
+        model_input = self.data_processor.build_model_input(raw_batch)
         return model_input
 
 class DataCollatorWithPadding:
-    def __init__(self, config=None):
+    # keys laid out along the transformer (subword) sequence dimension, i.e. every key returned by
+    # `tokenize_inputs` (`token_type_ids` only comes with BERT-style tokenizers)
+    sequence_keys = ('input_ids', 'attention_mask', 'token_type_ids', 'words_mask')
+    # keys that are 1D per example; with a leading batch dimension they would pass for span tensors
+    flat_keys = sequence_keys + ('text_lengths', 'span_mask')
+
+    def __init__(self, config=None, pad_to_multiple_of=8, pin_memory=False):
         """
         Initialize the DataCollator with configs.
-                """
+
+        :param pad_to_multiple_of: Round the length of the subword sequence keys up to a multiple
+            of this value so fp16/bf16 GEMMs in the encoder can use Tensor Cores. Word, span and
+            label dimensions are left untouched since the model ties them to the text length.
+        :param pin_memory: Allocate the outputs in page-locked memory (only when CUDA is available)
+            so they can be copied to the GPU with `non_blocking=True`. Only useful when the collator
+            runs in the main process; with DataLoader workers use `DataLoader(pin_memory=True)`.
+        """
         self.config = config
+        self.pad_to_multiple_of = pad_to_multiple_of
+        self.pin_memory = pin_memory and torch.cuda.is_available()
 
     def __call__(self, batch):
+        """
+        Pad and stack a list of examples.
+
+        Tensors are expected without a batch dimension (e.g. `input_ids` of shape `(seq_len,)`),
+        except token-level labels, which are concatenated along their batch dimension (dim 1).
+        """
         if not batch:
             raise ValueError("Batch cannot be empty")
 
         # Extract all keys from the first item
         keys = batch[0].keys()
 
-        # Create a dictionary to hold padded data
-        padded_batch = {key: [] for key in keys}
+        padded_batch = {}
 
         for key in keys:
             # Collect data for the current key
-            key_data = [item[key].squeeze(0) for item in batch]
+            key_data = [item[key] for item in batch]
 
             if isinstance(key_data[0], torch.Tensor):
                 if key_data[0].dim() == 1:
-                    # For 1D tensors, use pad_sequence
-                    padded_batch[key] = pad_sequence(key_data, batch_first=True)
+                    padded_batch[key] = self.pad_1d_tensor(key_data, round_up=key in self.sequence_keys)
                 elif key_data[0].dim() == 2: # span_idx case
+                    if key in self.flat_keys:
+                        raise ValueError(f"Key '{key}' has shape {tuple(key_data[0].shape)}, expected a 1D "
+                                         f"tensor per example; drop the batch dimension of the dataset items")
                     padded_batch[key] = self.pad_2d_tensor(key_data)
                 elif key == 'labels' and self.config.span_mode == 'token_level':
                     padded_batch[key] = self.pad_token_labels(key_data)
@@ -53,19 +76,80 @@ class DataCollatorWithPadding:
                     raise TypeError(f"Unsuported amount of dimension for key '{key}'")
             elif isinstance(key_data[0], list):
                 # Pad list-like data
-                max_length = max(len(seq) for seq in key_data)
-                padded_batch[key] = torch.tensor(
-                    [seq + [0] * (max_length - len(seq)) for seq in key_data],
-                    dtype=torch.float32
-                ).to(self.device)
+                padded_batch[key] = self.pad_lists(key_data)
             elif isinstance(key_data[0], (int, float)):
                 # Directly convert numeric data to tensors
-                padded_batch[key] = torch.tensor(key_data, dtype=torch.float32).to(self.device)
+                dtype = torch.int64 if all(isinstance(value, int) for value in key_data) else torch.float32
+                padded_batch[key] = torch.tensor(key_data, dtype=dtype)
             else:
                 raise TypeError(f"Unsupported data type for key '{key}': {type(key_data[0])}")
 
         return padded_batch
     
+    def round_length(self, length):
+        """
+        Round a sequence length up to the nearest multiple of `pad_to_multiple_of`.
+        """
+        multiple = self.pad_to_multiple_of
+        if not multiple:
+            return length
+        return (length + multiple - 1) // multiple * multiple
+
+    def allocate(self, shape, dtype, zero=True):
+        """
+        Return a zero-filled (or, with `zero=False`, uninitialized) CPU tensor of the given shape
+        and dtype, pinned if `pin_memory` is enabled.
+        """
+        if not zero:
+            return torch.empty(shape, dtype=dtype, pin_memory=self.pin_memory)
+        return torch.zeros(shape, dtype=dtype, pin_memory=self.pin_memory)
+
+    def stack(self, key_data):
+        """
+        Stack tensors that all have the same shape, no padding needed.
+        """
+        stacked = self.allocate((len(key_data), *key_data[0].shape), key_data[0].dtype, zero=False)
+        return torch.stack(key_data, out=stacked)
+
+    def pad_1d_tensor(self, key_data, round_up=False):
+        """
+        Pad a list of 1D tensors to the same length.
+
+        :param key_data: List of 1D tensors to pad.
+        :param round_up: Whether to round the padded length up to a multiple of `pad_to_multiple_of`.
+        :return: Tensor of padded tensors stacked along a new batch dimension.
+        """
+        lengths = np.fromiter((tensor.shape[0] for tensor in key_data), dtype=np.int64, count=len(key_data))
+        max_length = int(lengths.max())
+        if round_up:
+            max_length = self.round_length(max_length)
+        if lengths.min() == max_length:
+            return self.stack(key_data)
+
+        # Copy every tensor into its row of a single contiguous buffer through its numpy view
+        padded = self.allocate((len(key_data), max_length), key_data[0].dtype)
+        padded_np = padded.numpy()
+        for i, tensor in enumerate(key_data):
+            padded_np[i, :lengths[i]] = tensor.numpy()
+        return padded
+
+    def pad_lists(self, key_data):
+        """
+        Pad a list of numeric sequences into a single tensor.
+
+        :param key_data: List of lists of numbers to pad.
+        :return: int64 tensor if every value is an integer, float32 tensor otherwise.
+        """
+        max_length = max(len(seq) for seq in key_data)
+        is_integer = all(isinstance(value, int) for seq in key_data for value in seq)
+
+        # Fill the buffer row by row through its numpy view
+        padded = self.allocate((len(key_data), max_length), torch.int64 if is_integer else torch.float32)
+        padded_np = padded.numpy()
+        for i, seq in enumerate(key_data):
+            padded_np[i, :len(seq)] = seq
+        return padded
+
     def pad_2d_tensor(self, key_data):
         """
         Pad a list of 2D tensors to have the same size along both dimensions.
@@ -79,20 +163,14 @@ class DataCollatorWithPadding:
         # Determine the maximum size along both dimensions
         max_rows = max(tensor.shape[0] for tensor in key_data)
         max_cols = max(tensor.shape[1] for tensor in key_data)
-        
-        tensors = []
+        if all(tensor.shape == (max_rows, max_cols) for tensor in key_data):
+            return self.stack(key_data)
 
-        for tensor in key_data:
+        # Copy every tensor into a single zero-initialized tensor with a new batch dimension
+        padded_tensors = self.allocate((len(key_data), max_rows, max_cols), key_data[0].dtype)
+        for i, tensor in enumerate(key_data):
             rows, cols = tensor.shape
-            row_padding = max_rows - rows
-            col_padding = max_cols - cols
-
-            # Pad the tensor along both dimensions
-            padded_tensor = F.pad(tensor, (0, col_padding, 0, row_padding), mode='constant', value=0)
-            tensors.append(padded_tensor)
-
-        # Stack the tensors into a single tensor along a new batch dimension
-        padded_tensors = torch.stack(tensors)
+            padded_tensors[i, :rows, :cols].copy_(tensor)
 
         return padded_tensors
 
@@ -103,21 +181,17 @@ class DataCollatorWithPadding:
         # Determine the maximum sequence length and number of classes
         max_seq_len = max(tensor.shape[2] for tensor in key_data)
         max_num_classes = max(tensor.shape[3] for tensor in key_data)
-        
-        padded_tensors = []
-
+        total_batch_size = sum(tensor.shape[1] for tensor in key_data)
+
+        # Copy every tensor into its slice of a single zero-initialized tensor,
+        # concatenated along the batch dimension
+        num_labels = key_data[0].shape[0]
+        concatenated_labels = self.allocate((num_labels, total_batch_size, max_seq_len, max_num_classes), 
+                                                                                key_data[0].dtype)
+        offset = 0
         for tensor in key_data:
-            current_seq_len = tensor.shape[2]
-            current_num_classes = tensor.shape[3]
-
-            seq_padding = max_seq_len - current_seq_len
-            class_padding = max_num_classes - current_num_classes
-
-            # Pad tensor to the maximum sequence length and number of classes
-            padded_tensor = F.pad(tensor, (0, class_padding, 0, seq_padding), mode='constant', value=0)
-            padded_tensors.append(padded_tensor)
-        
-        # Concatenate the tensors along the batch dimension
-        concatenated_labels = torch.cat(padded_tensors, dim=1)
+            _, batch_size, seq_len, num_classes = tensor.shape
+            concatenated_labels.narrow(1, offset, batch_size).narrow(2, 0, seq_len).narrow(3, 0, num_classes).copy_(tensor)
+            offset += batch_size
         
-        return concatenated_labels
\ No newline at end of file
+        return concatenated_labels
@@ -128,6 +128,12 @@ class BaseProcessor(ABC):
     def collate_fn(self, batch, prepare_labels=True):
         model_input_batch = self.tokenize_and_prepare_labels(batch, prepare_labels)
         return model_input_batch
+
+    def build_model_input(self, raw_batch: Dict) -> Dict:
+        """Turn a `collate_raw_batch` output into the inference inputs of the model (no labels)."""
+        model_input = self.collate_fn(raw_batch, prepare_labels=False)
+        model_input["text_lengths"] = raw_batch["seq_length"]
+        return model_input
     
     @abstractmethod
     def create_batch_dict(self, batch: List[Dict], class_to_ids: List[Dict[str, int]],
@@ -208,6 +214,12 @@ class SpanProcessor(BaseProcessor):
             labels = self.create_labels(batch)
             tokenized_input['labels'] = labels
         return tokenized_input
+
+    def build_model_input(self, raw_batch):
+        model_input = super().build_model_input(raw_batch)
+        model_input["span_idx"] = raw_batch["span_idx"]
+        model_input["span_mask"] = raw_batch["span_mask"]
+        return model_input
     
 class TokenProcessor(BaseProcessor):
     def preprocess_example(self, tokens, ner, classes_to_id):
@@ -8,6 +8,29 @@ class TokenSplitterBase():
     def __call__(self, text) -> (str, int, int):
         pass
 
+    def batch_split(self, texts):
+        """
+        Split a batch of texts into words.
+
+        Returns three lists with one entry per text: the words, their start character
+        indices and their end character indices.
+        """
+        all_tokens = []
+        all_starts = []
+        all_ends = []
+        for text in texts:
+            tokens = []
+            starts = []
+            ends = []
+            for token, start, end in self(text):
+                tokens.append(token)
+                starts.append(start)
+                ends.append(end)
+            all_tokens.append(tokens)
+            all_starts.append(starts)
+            all_ends.append(ends)
+        return all_tokens, all_starts, all_ends
+
 
 class WhitespaceTokenSplitter(TokenSplitterBase):
     def __init__(self):
@@ -17,6 +40,17 @@ class WhitespaceTokenSplitter(TokenSplitterBase):
         for match in self.whitespace_pattern.finditer(text):
             yield match.group(), match.start(), match.end()
 
+    def batch_split(self, texts):
+        all_tokens = []
+        all_starts = []
+        all_ends = []
+        for text in texts:
+            matches = list(self.whitespace_pattern.finditer(text))
+            all_tokens.append([match.group() for match in matches])
+            all_starts.append([match.start() for match in matches])
+            all_ends.append([match.end() for match in matches])
+        return all_tokens, all_starts, all_ends
+
 
 class SpaCyTokenSplitter(TokenSplitterBase):
     def __init__(self, lang=None):
@@ -35,6 +69,16 @@ class SpaCyTokenSplitter(TokenSplitterBase):
         for token in doc:
             yield token.text, token.idx, token.idx + len(token.text)            
 
+    def batch_split(self, texts, batch_size=64):
+        all_tokens = []
+        all_starts = []
+        all_ends = []
+        for doc in self.nlp.pipe(texts, batch_size=batch_size):
+            all_tokens.append([token.text for token in doc])
+            all_starts.append([token.idx for token in doc])
+            all_ends.append([token.idx + len(token.text) for token in doc])
+        return all_tokens, all_starts, all_ends
+
 
 class MecabKoTokenSplitter(TokenSplitterBase):
     def __init__(self):
@@ -69,4 +113,7 @@ class WordsSplitter(TokenSplitterBase):
     
     def __call__(self, text):
         for token in self.splitter(text):
-            yield token
\ No newline at end of file
+            yield token
+
+    def batch_split(self, texts):
+        return self.splitter.batch_split(texts)
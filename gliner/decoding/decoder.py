@@ -39,29 +39,32 @@ class BaseDecoder(ABC):
 class SpanDecoder(BaseDecoder):
     def decode(self, tokens, id_to_classes, model_output, flat_ner=False, threshold=0.5, multi_label=False):
         probs = torch.sigmoid(model_output)
-        spans = []
-        for i, _ in enumerate(tokens):
-            probs_i = probs[i]
 
-            wh_i = [i.tolist() for i in torch.where(probs_i > threshold)]
-            span_i = []
-            for s, k, c in zip(*wh_i):
-                if s + k < len(tokens[i]):
-                    span_i.append((s, s + k, id_to_classes[c + 1], probs_i[s, k, c].item()))
+        # select the spans above threshold for the whole batch at once, so that indices and
+        # scores are brought back from the device once per batch instead of once per span
+        wh = torch.where(probs > threshold)
+        span_scores = probs[wh].tolist()
+        batch_ids, starts, widths, class_ids = [idx.tolist() for idx in wh]
 
-            span_i = self.greedy_search(span_i, flat_ner, multi_label=multi_label)
-            spans.append(span_i)
+        spans = [[] for _ in tokens]
+        for i, s, k, c, score in zip(batch_ids, starts, widths, class_ids, span_scores):
+            if s + k < len(tokens[i]):
+                spans[i].append((s, s + k, id_to_classes[c + 1], score))
+
+        spans = [self.greedy_search(span_i, flat_ner, multi_label=multi_label) for span_i in spans]
         return spans
     
 class TokenDecoder(BaseDecoder):
     def decode(self, tokens, id_to_classes, model_output, flat_ner=False, threshold=0.5, multi_label=False):
-        scores_start, scores_end, scores_inside = model_output
+        # a single sigmoid and host transfer for the whole batch, the per-span loop below
+        # would otherwise synchronize with the device on every `.item()`
+        scores_start, scores_end, scores_inside = torch.sigmoid(model_output).cpu()
         # shape: (batch_size, seq_len, num_classes)
         spans = []
         for i, _ in enumerate(tokens):
-            start_i = torch.sigmoid(scores_start[i])
-            end_i = torch.sigmoid(scores_end[i])
-            scores_inside_i = torch.sigmoid(scores_inside[i])  # (seq_len, num_classes)
+            start_i = scores_start[i]
+            end_i = scores_end[i]
+            scores_inside_i = scores_inside[i]  # (seq_len, num_classes)
 
             start_idx = [k.tolist() for k in torch.where(start_i > threshold)]
             end_idx = [k.tolist() for k in torch.where(end_i > threshold)]
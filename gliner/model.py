@@ -1,6 +1,8 @@
 import os
 import json
+import inspect
 import warnings
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Union, Dict, List
 
@@ -18,6 +20,59 @@ from .decoding import SpanDecoder, TokenDecoder
 from .config import GLiNERConfig
 
 from huggingface_hub import PyTorchModelHubMixin, snapshot_download
+from safetensors.torch import save_file as save_safetensors, load_file as load_safetensors
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# `torch.load(mmap=True)` and `load_state_dict(assign=True)` were both added in torch 2.1
+_TORCH_SUPPORTS_MMAP = "mmap" in inspect.signature(torch.load).parameters
+
+
+def _unshare_tensors(state_dict):
+    """
+    Make every tensor of a state dict own contiguous memory, as `safetensors` requires.
+
+    Tensors that share storage with an earlier entry (tied embeddings of T5/BART-style encoders,
+    cuDNN-flattened LSTM weights) are cloned, so the checkpoint keeps every key.
+    """
+    tensors = {}
+    seen_storages = set()
+    for name, tensor in state_dict.items():
+        storage = tensor.untyped_storage().data_ptr()
+        if storage in seen_storages or not tensor.is_contiguous():
+            tensor = tensor.clone(memory_format=torch.contiguous_format)
+        seen_storages.add(storage)
+        tensors[name] = tensor
+    return tensors
+
+
+def _load_weights(model_file, map_location):
+    """
+    Load a state dict from a `.safetensors` or `pytorch_model.bin` checkpoint.
+    """
+    if str(model_file).endswith(".safetensors"):
+        # tensors are read from a memory-mapped file straight onto the target device
+        return load_safetensors(model_file, device=str(map_location))
+    if _TORCH_SUPPORTS_MMAP:
+        # keep the weights memory-mapped until they are moved to the target device
+        return torch.load(model_file, map_location="cpu", mmap=True, weights_only=True)
+    return torch.load(model_file, map_location=torch.device(map_location))
+
+
+# `mtime` is only part of the cache key, so that overwritten checkpoints are read again
+@lru_cache(maxsize=4)
+def _load_cached_weights(model_file, map_location, mtime):
+    return _load_weights(model_file, map_location)
+
+
+@lru_cache(maxsize=4)
+def _load_cached_ort_session(model_file, mtime):
+    import onnxruntime as ort
+    return ort.InferenceSession(model_file)
+
 
 class GLiNER(nn.Module, PyTorchModelHubMixin):
     def __init__(self, config: GLiNERConfig, 
@@ -55,7 +110,7 @@ class GLiNER(nn.Module, PyTorchModelHubMixin):
         if isinstance(self.model, BaseORTModel):
             self.onnx_model = True
         else:
-            self.onnx_model = True
+            self.onnx_model = False
 
     def forward(self, *args, **kwargs):
         output = self.model(*args, **kwargs)
@@ -78,37 +133,21 @@ class GLiNER(nn.Module, PyTorchModelHubMixin):
         return model_embeds
 
     def prepare_model_inputs(self, texts: str, labels: str):
-        all_tokens = []
-        all_start_token_idx_to_text_idx = []
-        all_end_token_idx_to_text_idx = []
-
-        for text in texts:
-            tokens = []
-            start_token_idx_to_text_idx = []
-            end_token_idx_to_text_idx = []
-            for token, start, end in self.data_processor.words_splitter(text):
-                tokens.append(token)
-                start_token_idx_to_text_idx.append(start)
-                end_token_idx_to_text_idx.append(end)
-            all_tokens.append(tokens)
-            all_start_token_idx_to_text_idx.append(start_token_idx_to_text_idx)
-            all_end_token_idx_to_text_idx.append(end_token_idx_to_text_idx)
+        (all_tokens, all_start_token_idx_to_text_idx,
+                    all_end_token_idx_to_text_idx) = self.data_processor.words_splitter.batch_split(texts)
 
         input_x = [{"tokenized_text": tk, "ner": None} for tk in all_tokens]
         raw_batch = self.data_processor.collate_raw_batch(input_x, labels)
         raw_batch["all_start_token_idx_to_text_idx"] = all_start_token_idx_to_text_idx
         raw_batch["all_end_token_idx_to_text_idx"] = all_end_token_idx_to_text_idx
 
-        model_input = self.data_processor.collate_fn(raw_batch, prepare_labels=False)
-        model_input.update({"span_idx": raw_batch['span_idx'] if 'span_idx' in raw_batch else None, 
-                            "span_mask": raw_batch["span_mask"] if 'span_mask' in raw_batch else None,
-                            "text_lengths": raw_batch['seq_length']})
+        model_input = self.data_processor.build_model_input(raw_batch)
         
         if not self.onnx_model:
             device = next(self.model.parameters()).device
-            for key in model_input:
-                if model_input[key] is not None and isinstance(model_input[key], torch.Tensor):
-                    model_input[key] = model_input[key].to(device)
+            # issue all host-to-device copies asynchronously, they are ordered on the current stream
+            model_input = {key: value.to(device, non_blocking=True) if isinstance(value, torch.Tensor) else value
+                                                                    for key, value in model_input.items()}
 
         return model_input, raw_batch
     
@@ -138,19 +177,24 @@ class GLiNER(nn.Module, PyTorchModelHubMixin):
 
         all_entities = []
         for i, output in enumerate(outputs):
-            start_token_idx_to_text_idx = raw_batch['all_start_token_idx_to_text_idx'][i]
-            end_token_idx_to_text_idx = raw_batch['all_end_token_idx_to_text_idx'][i]
-            entities = []
-            for start_token_idx, end_token_idx, ent_type, ent_score in output:
-                start_text_idx = start_token_idx_to_text_idx[start_token_idx]
-                end_text_idx = end_token_idx_to_text_idx[end_token_idx]
-                entities.append({
-                    "start": start_token_idx_to_text_idx[start_token_idx],
-                    "end": end_token_idx_to_text_idx[end_token_idx],
-                    "text": texts[i][start_text_idx:end_text_idx],
+            if not output:
+                all_entities.append([])
+                continue
+            start_token_idx_to_text_idx = np.asarray(raw_batch['all_start_token_idx_to_text_idx'][i], dtype=np.int64)
+            end_token_idx_to_text_idx = np.asarray(raw_batch['all_end_token_idx_to_text_idx'][i], dtype=np.int64)
+
+            # map all predicted token spans to character offsets with one gather each
+            start_token_idx, end_token_idx, ent_types, ent_scores = zip(*output)
+            start_text_idx = start_token_idx_to_text_idx[list(start_token_idx)].tolist()
+            end_text_idx = end_token_idx_to_text_idx[list(end_token_idx)].tolist()
+
+            entities = [{
+                    "start": start,
+                    "end": end,
+                    "text": texts[i][start:end],
                     "label": ent_type,
                     "score": ent_score
-                })
+                } for start, end, ent_type, ent_score in zip(start_text_idx, end_text_idx, ent_types, ent_scores)]
             all_entities.append(entities)
 
         return all_entities
@@ -180,6 +224,7 @@ class GLiNER(nn.Module, PyTorchModelHubMixin):
             config: Optional[GLiNERConfig] = None,
             repo_id: Optional[str] = None,
             push_to_hub: bool = False,
+            safe_serialization: bool = True,
             **push_to_hub_kwargs,
     ) -> Optional[str]:
         """
@@ -192,6 +237,10 @@ class GLiNER(nn.Module, PyTorchModelHubMixin):
                 Model configuration specified as a key/value dictionary or a dataclass instance.
             push_to_hub (`bool`, *optional*, defaults to `False`):
                 Whether or not to push your model to the Huggingface Hub after saving it.
+            safe_serialization (`bool`, *optional*, defaults to `True`):
+                Whether to also save the weights as `model.safetensors`, which `from_pretrained`
+                prefers. `pytorch_model.bin` is always written, since GLiNER releases before
+                safetensors support only read that file.
             repo_id (`str`, *optional*):
                 ID of your repository on the Hub. Used only if `push_to_hub=True`. Will default to the folder name if
                 not provided.
@@ -202,7 +251,14 @@ class GLiNER(nn.Module, PyTorchModelHubMixin):
         save_directory.mkdir(parents=True, exist_ok=True)
 
         # save model weights/files
-        torch.save(self.model.state_dict(), save_directory / "pytorch_model.bin")
+        state_dict = self.model.state_dict()
+        torch.save(state_dict, save_directory / "pytorch_model.bin")
+        safetensors_file = save_directory / "model.safetensors"
+        if safe_serialization:
+            save_safetensors(_unshare_tensors(state_dict), safetensors_file)
+        elif safetensors_file.exists():
+            # `from_pretrained` would pick a stale file over the new `pytorch_model.bin`
+            safetensors_file.unlink()
 
         # save config (if provided)
         if config is None:
@@ -239,10 +295,11 @@ class GLiNER(nn.Module, PyTorchModelHubMixin):
             resize_token_embeddings: Optional[bool]=True,
             load_onnx_model: Optional[bool]=False,
             onnx_model_file: Optional[str] = 'model.onnx',
+            cache_weights: Optional[bool] = False,
             **model_kwargs,
     ):
 
-        # Newer format: Use "pytorch_model.bin" and "gliner_config.json"
+        # Newer format: Use "model.safetensors" (or "pytorch_model.bin") and "gliner_config.json"
         model_dir = Path(model_id)# / "pytorch_model.bin"
         if not model_dir.exists():
             model_dir = snapshot_download(
@@ -255,14 +312,17 @@ class GLiNER(nn.Module, PyTorchModelHubMixin):
                 token=token,
                 local_files_only=local_files_only,
             )
-        model_file = Path(model_dir) / "pytorch_model.bin"
+        model_file = Path(model_dir) / "model.safetensors"
+        if not model_file.exists():
+            model_file = Path(model_dir) / "pytorch_model.bin"
         config_file = Path(model_dir) / "gliner_config.json"
 
         if load_tokenizer:
             tokenizer = AutoTokenizer.from_pretrained(model_dir)
         else:
             tokenizer = None
-        config_ = json.load(open(config_file))
+        with open(config_file, "rb") as f:
+            config_ = orjson.loads(f.read()) if orjson is not None else json.load(f)
         config = GLiNERConfig(**config_)
         
         add_tokens = ['[FLERT]', config.ent_token, config.sep_token]
@@ -272,8 +332,24 @@ class GLiNER(nn.Module, PyTorchModelHubMixin):
             # to be able to laod GLiNER models from previous version
             if (config.class_token_index==-1 or config.vocab_size == -1) and resize_token_embeddings:
                 gliner.resize_token_embeddings(add_tokens=add_tokens)
-            state_dict = torch.load(model_file, map_location=torch.device(map_location))
-            gliner.model.load_state_dict(state_dict, strict=strict)
+            if cache_weights:
+                # the cache keeps the loaded state dict alive, release it with `GLiNER.clear_cache()`;
+                # models only share their weights when they are assigned (torch>=2.1) and
+                # the cached tensors are already on the target device (safetensors, or a `.bin`
+                # checkpoint with a CPU `map_location`), otherwise each model gets its own copy
+                state_dict = _load_cached_weights(str(model_file), str(map_location), 
+                                                            os.path.getmtime(model_file))
+            else:
+                state_dict = _load_weights(model_file, map_location)
+
+            if _TORCH_SUPPORTS_MMAP:
+                # let the parameters adopt the loaded tensors without a copy
+                gliner.model.load_state_dict(state_dict, strict=strict, assign=True)
+                # assigning gives tied parameters separate tensors, tie them again
+                gliner.model.token_rep_layer.bert_layer.model.tie_weights()
+            else:
+                gliner.model.load_state_dict(state_dict, strict=strict)
+            # no-op for weights already on the target device, moves the remaining buffers
             gliner.model.to(map_location)
 
         else:
@@ -283,7 +359,12 @@ class GLiNER(nn.Module, PyTorchModelHubMixin):
             if not os.path.exists(model_file):
                 raise FileNotFoundError(f"The ONNX model can't be loaded from {model_file}.")
             
-            ort_session = ort.InferenceSession(model_file)
+            if cache_weights:
+                # inference sessions are stateless, so they can be shared between models,
+                # release them with `GLiNER.clear_cache()`
+                ort_session = _load_cached_ort_session(str(model_file), os.path.getmtime(model_file))
+            else:
+                ort_session = ort.InferenceSession(model_file)
             if config.span_mode=='token_level':
                 model = TokenORTModel(ort_session)
             else:
@@ -294,3 +375,12 @@ class GLiNER(nn.Module, PyTorchModelHubMixin):
                 gliner.data_processor.transformer_tokenizer.add_tokens(add_tokens)
 
         return gliner
+
+    @staticmethod
+    def clear_cache():
+        """
+        Release the state dicts and ONNX sessions kept by `from_pretrained(..., cache_weights=True)`.
+        Models that were already loaded keep their weights.
+        """
+        _load_cached_weights.cache_clear()
+        _load_cached_ort_session.cache_clear()
@@ -7,6 +7,7 @@ from transformers.trainer import (
     get_parameter_names,
     ALL_LAYERNORM_LAYERS,
 )
+from transformers.trainer_pt_utils import LengthGroupedSampler
 
 @dataclass
 class TrainingArguments(transformers.TrainingArguments):
@@ -23,6 +24,19 @@ class Trainer(transformers.Trainer):
     def save_model(self, output_dir: Optional[str] = None, _internal_call: bool = False):
         self.model.save_pretrained(output_dir)
         
+    def _get_train_sampler(self, *args, **kwargs):
+        """
+        With `group_by_length`, use the dataset's precomputed `lengths` (if it has them) to put
+        examples of similar length into the same batches, instead of letting the base class
+        compute lengths by loading every example.
+        """
+        if self.args.group_by_length and hasattr(self.train_dataset, "lengths"):
+            return LengthGroupedSampler(
+                self.args.train_batch_size * self.args.gradient_accumulation_steps,
+                lengths=self.train_dataset.lengths,
+            )
+        return super()._get_train_sampler(*args, **kwargs)
+
     def compute_loss(self, model, inputs):
         """
         Override compute_loss to use a custom loss function.
@@ -17,6 +17,8 @@ class GLiNERDataset(Dataset):
     def __init__(self, examples, config, tokenizer, words_splitter):
         self._data = examples
         self.config=config
+        # number of words per example, used to group examples of similar length into batches
+        self.lengths = [min(len(example['tokenized_text']), config.max_len) for example in examples]
         if config.span_mode == "token_level":
             self.data_processor = TokenProcessor(config, tokenizer, words_splitter)
         else:
@@ -30,13 +32,17 @@ class GLiNERDataset(Dataset):
         raw_batch = self.data_processor.collate_raw_batch([example])
         
         model_input = self.data_processor.collate_fn(raw_batch, prepare_labels=True)
+        # drop the batch dimension of the single-item batch, the collator stacks items;
+        # span labels are already unbatched and token labels are concatenated along dim 1
+        item = {key: value[0] for key, value in model_input.items() if key != 'labels'}
+        item['labels'] = model_input['labels']
         if 'span_idx' in raw_batch:
-            model_input['span_idx'] = raw_batch['span_idx']
+            item['span_idx'] = raw_batch['span_idx'][0]
         if 'span_mask' in raw_batch:
-            model_input['span_mask'] = raw_batch['span_mask']
+            item['span_mask'] = raw_batch['span_mask'][0]
         if 'seq_length' in raw_batch:
-            model_input['text_lengths'] = raw_batch['seq_length']
-        return model_input
+            item['text_lengths'] = raw_batch['seq_length'][0]
+        return item
 
 
 if __name__ == '__main__':
@@ -91,6 +97,7 @@ if __name__ == '__main__':
         warmup_ratio=config.warmup_ratio,
         per_device_train_batch_size=config.train_batch_size,
         per_device_eval_batch_size=config.train_batch_size,
+        group_by_length=getattr(config, 'group_by_length', False),
         max_steps=config.num_steps,
         evaluation_strategy="epoch",
         save_steps = config.eval_every,